@@ -11,20 +11,28 @@ Usage:
 """
 
 import argparse
+import asyncio
+import os
 import random
+import string
 import time
-import threading
 import sys
 from datetime import datetime
+from itertools import accumulate
 from pathlib import Path
 
 
 # Sample log patterns
-LOG_LEVELS = ["DEBUG", "INFO", "WARN", "ERROR", "FATAL"]
-LOG_COMPONENTS = [
+LOG_LEVELS = ("DEBUG", "INFO", "WARN", "ERROR", "FATAL")
+LOG_COMPONENTS = (
     "Database", "WebServer", "APIHandler", "AuthService",
     "CacheManager", "MessageQueue", "FileProcessor", "Scheduler"
-]
+)
+
+# Weight towards INFO/DEBUG (more common in real logs), precomputed as
+# cumulative weights so random.choices() doesn't re-accumulate them per call
+LEVEL_WEIGHTS = (0.3, 0.5, 0.12, 0.06, 0.02)  # DEBUG, INFO, WARN, ERROR, FATAL
+LEVEL_CUM_WEIGHTS = tuple(accumulate(LEVEL_WEIGHTS))
 
 # Lorem ipsum-style words for message generation
 IPSUM_WORDS = [
@@ -55,79 +63,200 @@ MESSAGE_TEMPLATES = [
     "{count} active sessions, {idle} idle",
 ]
 
-NOUNS = ["record", "document", "entity", "object", "resource", "item", "entry"]
-ACTIONS = ["create", "update", "delete", "fetch", "process", "validate", "parse"]
-ERRORS = ["timeout", "connection refused", "invalid format", "not found", "permission denied"]
-METHODS = ["OAuth2", "SAML", "JWT", "API Key", "Basic Auth"]
-JOB_NAMES = ["data_sync", "report_generation", "cleanup", "backup", "indexing"]
-ENDPOINTS = ["users", "orders", "products", "auth", "analytics", "search"]
-FILENAMES = ["data.csv", "report.pdf", "config.json", "backup.tar.gz", "log.txt"]
+NOUNS = ("record", "document", "entity", "object", "resource", "item", "entry")
+ACTIONS = ("create", "update", "delete", "fetch", "process", "validate", "parse")
+ERRORS = ("timeout", "connection refused", "invalid format", "not found", "permission denied")
+METHODS = ("OAuth2", "SAML", "JWT", "API Key", "Basic Auth")
+JOB_NAMES = ("data_sync", "report_generation", "cleanup", "backup", "indexing")
+ENDPOINTS = ("users", "orders", "products", "auth", "analytics", "search")
+FILENAMES = ("data.csv", "report.pdf", "config.json", "backup.tar.gz", "log.txt")
+STATUSES = (200, 201, 400, 404, 500, 503)
+
+# Bound once to skip the module attribute lookup on every draw
+_choice = random.choice
+_bits = random.getrandbits
+
+# Value generators for each template field; only the fields a template
+# actually uses are drawn when a line is generated
+FIELD_GENERATORS = {
+    # Integer fields use low + getrandbits(16) % span rather than randint():
+    # the slight modulo bias is irrelevant for test data and it is much cheaper
+    'noun': lambda: _choice(NOUNS),
+    'action': lambda: _choice(ACTIONS),
+    'user_id': lambda: f"user_{1000 + _bits(16) % 9000}",
+    'latency': lambda: 10 + _bits(16) % 1991,
+    'status': lambda: _choice(STATUSES),
+    'percentage': lambda: 10 + _bits(16) % 90,
+    'count': lambda: 1 + _bits(16) % 100,
+    'max_count': lambda: 100 + _bits(16) % 401,
+    'error': lambda: _choice(ERRORS),
+    'method': lambda: _choice(METHODS),
+    'job_name': lambda: _choice(JOB_NAMES),
+    'endpoint': lambda: _choice(ENDPOINTS),
+    'filename': lambda: _choice(FILENAMES),
+    'timeout': lambda: 5 + _bits(16) % 56,
+    'attempt': lambda: 1 + _bits(16) % 3,
+    'max_attempts': lambda: 3,
+    'idle': lambda: _bits(16) % 51,
+    'size': lambda: 100 + _bits(16) % 7901,
+    'max_size': lambda: 8000 + _bits(16) % 8001,
+}
+
+
+def compile_template(template):
+    """Parse a message template once into a function that renders it.
+
+    The returned function only draws the fields the template references and
+    joins pre-split literal text, so the format string is not re-parsed
+    for every line.
+    """
+    parts = []
+    for literal, field, _, _ in string.Formatter().parse(template):
+        if literal:
+            parts.append(literal)
+        if field is not None:
+            parts.append(FIELD_GENERATORS[field])
+
+    def render():
+        return ''.join(p if isinstance(p, str) else str(p()) for p in parts)
+
+    return render
+
+
+COMPILED_TEMPLATES = [compile_template(t) for t in MESSAGE_TEMPLATES]
+
+# Number of lines' worth of level/component/template picks drawn at once
+POOL_SIZE = 4096
+
+
+class RandomPool:
+    """Pre-drawn level, component and template picks for upcoming lines.
+
+    random.choices(k=...) draws a whole batch in one C-level loop, so
+    refilling every POOL_SIZE lines is far cheaper than three separate
+    random calls per line.
+    """
+
+    def __init__(self):
+        self.refill()
+
+    def refill(self):
+        self.levels = random.choices(LOG_LEVELS, cum_weights=LEVEL_CUM_WEIGHTS, k=POOL_SIZE)
+        self.components = random.choices(LOG_COMPONENTS, k=POOL_SIZE)
+        self.templates = random.choices(COMPILED_TEMPLATES, k=POOL_SIZE)
+        self.index = 0
+
+    def draw(self):
+        """Return the next (level, component, template) triple."""
+        if self.index == POOL_SIZE:
+            self.refill()
+        i = self.index
+        self.index = i + 1
+        return self.levels[i], self.components[i], self.templates[i]
+
+
+_pool = RandomPool()
+
+
+# (second, formatted "YYYY-mm-dd HH:MM:SS") of the last timestamp produced
+_last_second = (None, "")
+
+
+def format_timestamp():
+    """Return the current local time with millisecond precision.
+
+    The date/time part only changes once per second, so it is cached and
+    just the millisecond tail is formatted per line.
+    """
+    global _last_second
+    now = time.time()
+    second = int(now)
+    cached = _last_second
+    if cached[0] != second:
+        cached = (second, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second)))
+        _last_second = cached
+    return f"{cached[1]}.{int((now - second) * 1000):03d}"
 
 
 def generate_log_line():
     """Generate a realistic log line."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-    level = random.choice(LOG_LEVELS)
-    component = random.choice(LOG_COMPONENTS)
-
-    # Weight towards INFO/DEBUG (more common in real logs)
-    weights = [0.3, 0.5, 0.12, 0.06, 0.02]  # DEBUG, INFO, WARN, ERROR, FATAL
-    level = random.choices(LOG_LEVELS, weights=weights)[0]
-
-    # Generate message from template
-    template = random.choice(MESSAGE_TEMPLATES)
-    message = template.format(
-        noun=random.choice(NOUNS),
-        action=random.choice(ACTIONS),
-        user_id=f"user_{random.randint(1000, 9999)}",
-        latency=random.randint(10, 2000),
-        status=random.choice([200, 201, 400, 404, 500, 503]),
-        percentage=random.randint(10, 99),
-        count=random.randint(1, 100),
-        max_count=random.randint(100, 500),
-        error=random.choice(ERRORS),
-        method=random.choice(METHODS),
-        job_name=random.choice(JOB_NAMES),
-        endpoint=random.choice(ENDPOINTS),
-        filename=random.choice(FILENAMES),
-        timeout=random.randint(5, 60),
-        attempt=random.randint(1, 3),
-        max_attempts=3,
-        idle=random.randint(0, 50),
-        size=random.randint(100, 8000),
-        max_size=random.randint(8000, 16000),
-    )
+    return generate_log_lines(1)
+
+
+def generate_log_lines(count):
+    """Generate a burst of `count` log lines as a single string.
+
+    The lines of a burst are written at the same instant, so the timestamp
+    is formatted once and the per-line work stays in one loop.
+    """
+    timestamp = format_timestamp()
+    draw = _pool.draw
+    lines = []
+    for _ in range(count):
+        level, component, template = draw()
+        # Message comes from a precompiled template
+        lines.append(f"{timestamp} [{level:5}] {component:15} - {template()}\n")
+    return ''.join(lines)
 
-    return f"{timestamp} [{level:5}] {component:15} - {message}\n"
+
+# Generated output is buffered per file and written once this much is
+# pending, or by flush_periodically() after at most FLUSH_INTERVAL seconds
+WRITE_BUFFER_SIZE = 16 * 1024
+FLUSH_INTERVAL = 0.1
 
 
 class LogGenerator:
     """Generates log entries for a single file."""
 
+    # Lines written and bursts across all generators, kept alongside the
+    # per-file counts so status reporting reads one value instead of summing
+    total_lines_written = 0
+    total_bursts = 0
+
     def __init__(self, filepath, rate_config, file_index):
         self.filepath = filepath
         self.rate_config = rate_config
         self.file_index = file_index
-        self.running = False
-        self.thread = None
         self.lines_written = 0
-
-    def start(self):
-        """Start generating logs in a background thread."""
-        self.running = True
-        self.thread = threading.Thread(target=self._generate_loop, daemon=True)
-        self.thread.start()
-
-    def stop(self):
-        """Stop generating logs."""
-        self.running = False
-        if self.thread:
-            self.thread.join()
-
-    def _generate_loop(self):
-        """Main loop that generates log entries."""
-        with open(self.filepath, 'a') as f:
-            while self.running:
+        self.bursts = 0
+        self.fd = None
+        self.pending = bytearray()
+
+    def _count(self, lines):
+        """Record lines generated for this file and the overall total."""
+        self.lines_written += lines
+        LogGenerator.total_lines_written += lines
+
+    def _append(self, text):
+        """Queue text for the file, writing it out if the buffer is full."""
+        self.pending += text.encode()
+        if len(self.pending) >= WRITE_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Write any buffered output to the file."""
+        if self.fd is None:
+            return
+        # os.write may write less than asked; keep going until it's all out
+        while self.pending:
+            written = os.write(self.fd, self.pending)
+            del self.pending[:written]
+
+    async def produce(self):
+        """Generate log entries until cancelled.
+
+        All generators share one event loop; file writes stay synchronous
+        since appending a few lines to a local file doesn't block
+        meaningfully.
+        """
+        # Raw append-mode fd, written by flush() from this generator's pending
+        # buffer (at WRITE_BUFFER_SIZE or every FLUSH_INTERVAL) rather than
+        # through a buffered text file object
+        self.fd = os.open(self.filepath,
+                          os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0),
+                          0o644)
+        try:
+            while True:
                 # Random interval based on rate
                 interval = random.uniform(
                     self.rate_config['min_interval'],
@@ -137,20 +266,72 @@ class LogGenerator:
                 # Sometimes write bursts
                 if random.random() < 0.1:  # 10% chance of burst
                     burst_size = random.randint(3, 10)
-                    for _ in range(burst_size):
-                        line = generate_log_line()
-                        f.write(line)
-                        f.flush()
-                        self.lines_written += 1
-                    print(f"[File {self.file_index}] Burst: {burst_size} lines")
+                    self._append(generate_log_lines(burst_size))
+                    self._count(burst_size)
+                    # Counted rather than printed; the status line reports bursts
+                    self.bursts += 1
+                    LogGenerator.total_bursts += 1
                 else:
                     # Single line
-                    line = generate_log_line()
-                    f.write(line)
-                    f.flush()
-                    self.lines_written += 1
+                    self._append(generate_log_line())
+                    self._count(1)
+
+                await asyncio.sleep(interval)
+        finally:
+            self.flush()
+            os.close(self.fd)
+            self.fd = None
+
+
+async def flush_periodically(generators):
+    """Write out every generator's buffered output each FLUSH_INTERVAL."""
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        for gen in generators:
+            gen.flush()
+
+
+async def report_status(duration):
+    """Print a status line every second, returning after `duration` seconds.
+
+    Runs until cancelled when duration is 0.
+    """
+    start_time = time.time()
+    while duration == 0 or time.time() - start_time < duration:
+        await asyncio.sleep(1)
+        elapsed = int(time.time() - start_time)
+
+        total_lines = LogGenerator.total_lines_written
+        total_bursts = LogGenerator.total_bursts
+        if duration > 0:
+            sys.stdout.write(f"\r[{elapsed:3d}s / {duration}s] Lines written: {total_lines:5d}  Bursts: {total_bursts:4d}  ")
+        else:
+            sys.stdout.write(f"\r[{elapsed:4d}s] Lines written: {total_lines:6d}  Bursts: {total_bursts:5d}  ")
+        sys.stdout.flush()
+
+
+async def run_generators(generators, duration):
+    """Run all generators on one event loop, reporting status every second.
+
+    Runs for `duration` seconds, or until interrupted when duration is 0.
+    Stops early and re-raises if a generator or the flusher fails.
+    """
+    tasks = [asyncio.create_task(gen.produce()) for gen in generators]
+    tasks.append(asyncio.create_task(flush_periodically(generators)))
+    tasks.append(asyncio.create_task(report_status(duration)))
+
+    try:
+        # Producers and the flusher only finish by failing, so whichever task
+        # completes first is either the status loop running out or an error
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-                time.sleep(interval)
+    for task in done:
+        if task.exception() is not None:
+            raise task.exception()
 
 
 def main():
@@ -252,8 +433,9 @@ Examples:
     for i in range(args.files):
         filepath = output_dir / f"{args.prefix}_{i+1}.log"
 
-        # Create file with header
-        with open(filepath, 'w') as f:
+        # Create file with header; newline='\n' matches the raw binary
+        # writes in LogGenerator so Windows doesn't get mixed line endings
+        with open(filepath, 'w', newline='\n') as f:
             f.write(f"# Log file generated at {datetime.now()}\n")
             f.write(f"# Rate: {rate_config['min_interval']}-{rate_config['max_interval']}s\n")
             f.write("# ============================================\n")
@@ -265,49 +447,20 @@ Examples:
     print("\nStarting log generation... (Ctrl+C to stop)")
     print()
 
-    # Start all generators
-    for gen in generators:
-        gen.start()
-
     try:
-        # Run for specified duration or until interrupted
-        if args.duration > 0:
-            start_time = time.time()
-            while time.time() - start_time < args.duration:
-                time.sleep(1)
-                elapsed = int(time.time() - start_time)
-                remaining = args.duration - elapsed
-
-                # Print status
-                total_lines = sum(g.lines_written for g in generators)
-                sys.stdout.write(f"\r[{elapsed:3d}s / {args.duration}s] Lines written: {total_lines:5d}  ")
-                sys.stdout.flush()
-        else:
-            # Run indefinitely
-            start_time = time.time()
-            while True:
-                time.sleep(1)
-                elapsed = int(time.time() - start_time)
-                total_lines = sum(g.lines_written for g in generators)
-                sys.stdout.write(f"\r[{elapsed:4d}s] Lines written: {total_lines:6d}  ")
-                sys.stdout.flush()
-
+        asyncio.run(run_generators(generators, args.duration))
     except KeyboardInterrupt:
         print("\n\nStopping log generation...")
 
-    # Stop all generators
-    for gen in generators:
-        gen.stop()
-
     print()
     print("Summary:")
     print("--------")
     for i, gen in enumerate(generators):
         filepath = output_dir / f"{args.prefix}_{i+1}.log"
         size = filepath.stat().st_size
-        print(f"  {filepath.name}: {gen.lines_written} lines, {size:,} bytes")
+        print(f"  {filepath.name}: {gen.lines_written} lines ({gen.bursts} bursts), {size:,} bytes")
 
-    total_lines = sum(g.lines_written for g in generators)
+    total_lines = LogGenerator.total_lines_written
     print(f"\nTotal: {total_lines} lines written")
     print(f"\nTest with: ./run.sh -f {' '.join(str(output_dir / f'{args.prefix}_{i+1}.log') for i in range(args.files))}")
 
@@ -9,9 +9,9 @@ import sys
 import os
 import time
 import random
-import subprocess
 import signal
-import threading
+import asyncio
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 from pathlib import Path
 
@@ -48,16 +48,23 @@ print(f"  Nested: {colors.GREEN}{NESTED}{colors.NC}")
 # Create log directory
 Path(LOG_DIR).mkdir(exist_ok=True)
 
-def create_log_file(num):
-    """Create a log file with initial content"""
-    file_path = Path(LOG_DIR) / f"test_{num}.log"
+# Absolute log directory, resolved once for the layout file paths
+LOG_DIR_PATH = Path.cwd().absolute() / LOG_DIR
+
+def create_log_files(file_nums):
+    """Create log files with initial content"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(f"[{timestamp}] Starting test log {num}\n")
-        f.write(f"[{timestamp}] Initial content for testing\n")
+    for num in file_nums:
+        (Path(LOG_DIR) / f"test_{num}.log").write_text(
+            f"[{timestamp}] Starting test log {num}\n"
+            f"[{timestamp}] Initial content for testing\n",
+            encoding='utf-8')
+
+def generate_group(group_num, indent, files_per_group, start_file, parts):
+    """Generate a group with files, appending its YAML fragments to parts.
 
-def generate_group(group_num, indent, files_per_group, start_file):
-    """Generate a group with files"""
+    Returns the numbers of the log files the group references.
+    """
     group_names = ["Application Logs", "System Logs", "Service Logs", "Database Logs",
                    "Network Logs", "Security Logs", "Performance Logs", "Error Logs"]
     icons = ["📱", "🖥️", "⚙️", "🗄️", "🌐", "🔒", "📊", "❌"]
@@ -66,65 +73,62 @@ def generate_group(group_num, indent, files_per_group, start_file):
     icon = icons[group_num % len(icons)]
     collapsed = "true" if group_num > 1 else "false"
     
-    output = f"""{indent}- name: "{group_name}"
+    parts.append(f"""{indent}- name: "{group_name}"
 {indent}  icon: "{icon}"
 {indent}  collapsed: {collapsed}
-"""
+""")
     
     # Add nested groups if requested
     if NESTED and group_num == 0:
-        output += f"""{indent}  groups:
+        parts.append(f"""{indent}  groups:
 {indent}    - name: "Core Services"
 {indent}      files:
-"""
+""")
         # Add half the files to nested group
         nested_files = files_per_group // 2
         for j in range(nested_files):
             file_num = start_file + j
             # Use as_posix() to get forward slashes for YAML compatibility on Windows
-            file_path = (Path.cwd() / LOG_DIR / f"test_{file_num}.log").absolute().as_posix()
-            output += f"""{indent}        - path: "{file_path}"
+            file_path = (LOG_DIR_PATH / f"test_{file_num}.log").as_posix()
+            parts.append(f"""{indent}        - path: "{file_path}"
 {indent}          name: "Test Log {file_num}"
-"""
-            create_log_file(file_num)
+""")
         
-        output += f"""{indent}    - name: "Background Jobs"
+        parts.append(f"""{indent}    - name: "Background Jobs"
 {indent}      collapsed: true
 {indent}      files:
-"""
+""")
         # Add remaining files to second nested group
         for j in range(nested_files, files_per_group):
             file_num = start_file + j
             # Use as_posix() to get forward slashes for YAML compatibility on Windows
-            file_path = (Path.cwd() / LOG_DIR / f"test_{file_num}.log").absolute().as_posix()
-            output += f"""{indent}        - path: "{file_path}"
+            file_path = (LOG_DIR_PATH / f"test_{file_num}.log").as_posix()
+            parts.append(f"""{indent}        - path: "{file_path}"
 {indent}          name: "Test Log {file_num}"
-"""
-            create_log_file(file_num)
+""")
     else:
         # Simple flat files
-        output += f"""{indent}  files:
-"""
+        parts.append(f"""{indent}  files:
+""")
         for j in range(files_per_group):
             file_num = start_file + j
             # Use as_posix() to get forward slashes for YAML compatibility on Windows
-            file_path = (Path.cwd() / LOG_DIR / f"test_{file_num}.log").absolute().as_posix()
-            output += f"""{indent}    - path: "{file_path}"
+            file_path = (LOG_DIR_PATH / f"test_{file_num}.log").as_posix()
+            parts.append(f"""{indent}    - path: "{file_path}"
 {indent}      name: "Test Log {file_num}"
-"""
-            create_log_file(file_num)
-    
-    return output
+""")
 
-# Start building YAML
-yaml_content = f"""name: "Test Tree Layout - {NUM_GROUPS} groups, {NUM_FILES} files"
+    return list(range(start_file, start_file + files_per_group))
+
+# Start building YAML; fragments are collected and joined once at the end
+yaml_parts = [f"""name: "Test Tree Layout - {NUM_GROUPS} groups, {NUM_FILES} files"
 version: 1
 settings:
   poll_interval_ms: 250
   auto_expand_active: true
 
 groups:
-"""
+"""]
 
 # Calculate files per group
 files_per_group = NUM_FILES // NUM_GROUPS
@@ -132,25 +136,55 @@ remainder = NUM_FILES % NUM_GROUPS
 
 # Generate groups
 file_counter = 1
+file_nums = []
 for i in range(NUM_GROUPS):
     # Distribute remainder files across first groups
     files_in_group = files_per_group + (1 if i < remainder else 0)
     
-    yaml_content += generate_group(i, "  ", files_in_group, file_counter)
+    file_nums += generate_group(i, "  ", files_in_group, file_counter, yaml_parts)
     file_counter += files_in_group
 
+create_log_files(file_nums)
+
 # Write YAML file
 with open(LAYOUT_FILE, 'w', encoding='utf-8') as f:
-    f.write(yaml_content)
+    f.write("".join(yaml_parts))
 
 print(f"\n{colors.GREEN}✓ Created layout file: {LAYOUT_FILE}{colors.NC}")
 print(f"{colors.GREEN}✓ Created {NUM_FILES} log files in {LOG_DIR}/{colors.NC}")
 
-# Global flag for log appender
-should_stop = False
+# (second, formatted "YYYY-mm-dd HH:MM:SS") of the last timestamp produced
+_last_second = (None, "")
+
+def format_timestamp():
+    """Current local time with milliseconds, caching the per-second part"""
+    global _last_second
+    now = time.time()
+    second = int(now)
+    if _last_second[0] != second:
+        _last_second = (second, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second)))
+    return f"{_last_second[1]}.{int((now - second) * 1000):03d}"
+
+# Recently written log files stay open rather than being reopened for every
+# line; opened lazily and capped so large layouts stay within the fd limit
+MAX_OPEN_LOGS = 32
+log_handles = OrderedDict()
 
-def append_logs():
-    """Continuously append random log entries to files"""
+def get_log_handle(num):
+    """Open handle for a log file, closing the least recently used if needed"""
+    handle = log_handles.get(num)
+    if handle is not None:
+        log_handles.move_to_end(num)
+        return handle
+    if len(log_handles) >= MAX_OPEN_LOGS:
+        _, oldest = log_handles.popitem(last=False)
+        oldest.close()
+    handle = open(Path(LOG_DIR) / f"test_{num}.log", 'a', encoding='utf-8', buffering=8192)
+    log_handles[num] = handle
+    return handle
+
+async def append_logs():
+    """Continuously append random log entries to files until cancelled"""
     messages = [
         "Processing request from client",
         "Database connection established",
@@ -166,69 +200,102 @@ def append_logs():
     
     levels = ["INFO", "WARN", "ERROR", "DEBUG"]
     
-    while not should_stop:
+    while True:
         # Randomly select a few files to update
         files_to_update = random.randint(1, 3)
+        per_file = defaultdict(list)
         
         for _ in range(files_to_update):
             file_num = random.randint(1, NUM_FILES)
-            file_path = Path(LOG_DIR) / f"test_{file_num}.log"
             level = random.choice(levels)
             msg = random.choice(messages)
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+            timestamp = format_timestamp()
             value = random.randint(0, 999)
-            
-            with open(file_path, 'a', encoding='utf-8') as f:
-                f.write(f"[{timestamp}] [{level}] {msg} {value}\n")
+            per_file[file_num].append(f"[{timestamp}] [{level}] {msg} {value}\n")
         
-        time.sleep(random.uniform(0.1, 1.0))
-
-# Start log appender in background thread
-print(f"\n{colors.YELLOW}Starting log appender in background...{colors.NC}")
-appender_thread = threading.Thread(target=append_logs, daemon=True)
-appender_thread.start()
-
-def cleanup(signum=None, frame=None):
-    """Cleanup on exit"""
-    global should_stop
-    print(f"\n{colors.YELLOW}Stopping log appender...{colors.NC}")
-    should_stop = True
-    if appender_thread.is_alive():
-        appender_thread.join(timeout=2)
-    sys.exit(0)
-
-# Register cleanup on signals
-signal.signal(signal.SIGINT, cleanup)
-signal.signal(signal.SIGTERM, cleanup)
-
-# Launch vis-grep with the layout
-print(f"\n{colors.CYAN}Launching vis-grep with tree layout...{colors.NC}")
-print(f"{colors.CYAN}Press Ctrl+C to stop{colors.NC}\n")
-
-# Build and run vis-grep
-try:
-    print("Building vis-grep...", file=sys.stderr)
-    
-    # Try release build first
-    result = subprocess.run(["cargo", "build", "--release"],
-                          capture_output=True, text=True)
-    
-    if result.returncode == 0:
-        exe_path = Path("target/release/vis-grep.exe" if sys.platform == "win32" else "target/release/vis-grep")
-    else:
-        # Fall back to debug build
-        subprocess.run(["cargo", "build"], capture_output=True)
-        exe_path = Path("target/debug/vis-grep.exe" if sys.platform == "win32" else "target/debug/vis-grep")
-    
-    if exe_path.exists():
-        # Run vis-grep with layout file
-        subprocess.run([str(exe_path), "--tail-layout", LAYOUT_FILE])
-    else:
-        print("Error: Could not find vis-grep executable", file=sys.stderr)
-        sys.exit(1)
+        # One write per touched file, flushed before sleeping so vis-grep
+        # sees the new lines straight away
+        for file_num, lines in per_file.items():
+            handle = get_log_handle(file_num)
+            handle.writelines(lines)
+            handle.flush()
         
+        await asyncio.sleep(random.uniform(0.1, 1.0))
+
+def close_log_handles():
+    """Close the appender's log files"""
+    for handle in log_handles.values():
+        handle.close()
+    log_handles.clear()
+
+async def run_vis_grep():
+    """Build and run vis-grep with the layout while appending to the logs.
+
+    Returns the process exit code.
+    """
+    # Start log appender alongside the build and vis-grep
+    print(f"\n{colors.YELLOW}Starting log appender in background...{colors.NC}")
+    appender = asyncio.create_task(append_logs())
+
+    # Stop cleanly on Ctrl+C / SIGTERM by cancelling this task
+    loop = asyncio.get_running_loop()
+    main_task = asyncio.current_task()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, main_task.cancel)
+        except NotImplementedError:
+            # Not supported on Windows; Ctrl+C surfaces as KeyboardInterrupt
+            # from asyncio.run() instead
+            pass
+
+    # Launch vis-grep with the layout
+    print(f"\n{colors.CYAN}Launching vis-grep with tree layout...{colors.NC}")
+    print(f"{colors.CYAN}Press Ctrl+C to stop{colors.NC}\n")
+
+    # Whichever child (cargo build or vis-grep) is running, so it can be
+    # killed if we're cancelled
+    child = None
+    try:
+        print("Building vis-grep...", file=sys.stderr)
+
+        # Try release build first
+        child = await asyncio.create_subprocess_exec(
+            "cargo", "build", "--release",
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        await child.communicate()
+
+        if child.returncode == 0:
+            exe_path = Path("target/release/vis-grep.exe" if sys.platform == "win32" else "target/release/vis-grep")
+        else:
+            # Fall back to debug build
+            child = await asyncio.create_subprocess_exec(
+                "cargo", "build",
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            await child.communicate()
+            exe_path = Path("target/debug/vis-grep.exe" if sys.platform == "win32" else "target/debug/vis-grep")
+
+        if not exe_path.exists():
+            print("Error: Could not find vis-grep executable", file=sys.stderr)
+            return 1
+
+        # Run vis-grep with layout file
+        child = await asyncio.create_subprocess_exec(str(exe_path), "--tail-layout", LAYOUT_FILE)
+        await child.wait()
+        return 0
+    except asyncio.CancelledError:
+        if child is not None and child.returncode is None:
+            child.kill()
+            await child.wait()
+        return 0
+    finally:
+        print(f"\n{colors.YELLOW}Stopping log appender...{colors.NC}")
+        appender.cancel()
+        await asyncio.gather(appender, return_exceptions=True)
+
+try:
+    exit_code = asyncio.run(run_vis_grep())
 except KeyboardInterrupt:
-    pass
+    exit_code = 0
 finally:
-    cleanup()
-
+    close_log_handles()
+sys.exit(exit_code)